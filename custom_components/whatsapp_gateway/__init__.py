@@ -1,47 +1,202 @@
 """WhatsApp Gateway integration for Home Assistant."""
 from __future__ import annotations
 
+import asyncio
+import functools
 import logging
+import re
 
 import aiohttp
 import voluptuous as vol
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, ServiceCall
 from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.json import json_bytes
+from homeassistant.util.json import json_loads
 
 _LOGGER = logging.getLogger(__name__)
 
 DOMAIN = "whatsapp_gateway"
 CONF_ADDON_URL = "addon_url"
+CONF_CONCURRENCY = "concurrency"
+CONF_RATE_LIMIT = "rate_limit"
 
 # Default URL when running as add-on (internal Docker network)
 # For local add-ons: http://local-{slug with underscores as dashes}:port
 # For HA OS/Supervised: use hostname based on slug
 DEFAULT_ADDON_URL = "http://local-whatsapp-gateway-api:8099"
 
+# Outgoing send limits (in-flight requests and messages per second)
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RATE_LIMIT = 50
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Retry policy for transient add-on failures. 500 is deliberately excluded:
+# the add-on returns it for any send error (invalid number, disconnected
+# instance, or a failure after the message was delivered), so retrying it
+# would be pointless or send a duplicate message
+_RETRY_ATTEMPTS = 3
+_RETRY_BASE_DELAY = 0.5
+_RETRY_MAX_DELAY = 8.0
+_RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+# The add-on sends batch messages one after another
+_BATCH_TIMEOUT = 30
+_BATCH_TIMEOUT_PER_MESSAGE = 10
+# How long to use per-recipient sends before checking the batch endpoint again
+_BATCH_REPROBE_INTERVAL = 3600
+
+# Phone number normalization
+_NON_DIGIT_RE = re.compile(r"\D+")
+_WA_SUFFIX = "@s.whatsapp.net"
+_PHONE_NUMBER_RE = re.compile(r"\+?[\d\s().-]+")
+_JID_RE = re.compile(r"[^@\s,]+@[^@\s,]+")
+
 # Service schemas
 SERVICE_SEND_MESSAGE = "send_message"
 SERVICE_SEND_MEDIA = "send_media"
+SERVICE_SEND_MESSAGES = "send_messages"
 
 ATTR_NUMBER = "number"
 ATTR_TEXT = "text"
 ATTR_MEDIA_URL = "media_url"
 ATTR_MEDIA_TYPE = "media_type"
 ATTR_CAPTION = "caption"
+ATTR_RECIPIENTS = "recipients"
+
+MEDIA_TYPES = frozenset(("image", "document", "audio", "video"))
+
+_NON_EMPTY_STRING = vol.All(cv.string, vol.Length(min=1))
+
+# Upper bound for a single send_messages call
+MAX_RECIPIENTS = 100
+
+
+def _recipient(value: object) -> str:
+    """Validate a single phone number (7-15 digits, E.164) or full JID."""
+    value = cv.string(value)
+    if "@" in value:
+        if _JID_RE.fullmatch(value) is None:
+            raise vol.Invalid(f"Invalid WhatsApp JID: {value}")
+        return value
+    digits = _NON_DIGIT_RE.sub("", value)
+    if _PHONE_NUMBER_RE.fullmatch(value) is None or not 7 <= len(digits) <= 15:
+        raise vol.Invalid(f"Invalid phone number: {value}")
+    return value
+
 
 SEND_MESSAGE_SCHEMA = vol.Schema({
-    vol.Required(ATTR_NUMBER): cv.string,
-    vol.Required(ATTR_TEXT): cv.string,
+    vol.Required(ATTR_NUMBER): _NON_EMPTY_STRING,
+    vol.Required(ATTR_TEXT): _NON_EMPTY_STRING,
+})
+
+SEND_MESSAGES_SCHEMA = vol.Schema({
+    vol.Required(ATTR_RECIPIENTS): vol.All(
+        [_recipient], vol.Length(min=1, max=MAX_RECIPIENTS)
+    ),
+    vol.Required(ATTR_TEXT): _NON_EMPTY_STRING,
 })
 
 SEND_MEDIA_SCHEMA = vol.Schema({
-    vol.Required(ATTR_NUMBER): cv.string,
-    vol.Required(ATTR_MEDIA_URL): cv.string,
-    vol.Optional(ATTR_MEDIA_TYPE, default="image"): vol.In(["image", "document", "audio", "video"]),
+    vol.Required(ATTR_NUMBER): _NON_EMPTY_STRING,
+    vol.Required(ATTR_MEDIA_URL): _NON_EMPTY_STRING,
+    vol.Optional(ATTR_MEDIA_TYPE, default="image"): vol.In(MEDIA_TYPES),
     vol.Optional(ATTR_CAPTION): cv.string,
 })
 
 
+class _EndpointNotFound(Exception):
+    """Raised when the add-on does not provide the requested endpoint."""
+
+
+@functools.lru_cache(maxsize=256)
+def _normalize_jid(number: str) -> str:
+    """Convert a phone number to a WhatsApp JID, leaving full JIDs untouched."""
+    if "@" in number:
+        return number
+    # Remove any non-numeric characters
+    return _NON_DIGIT_RE.sub("", number) + _WA_SUFFIX
+
+
+async def _post_json(
+    session: aiohttp.ClientSession,
+    url: str,
+    payload: dict,
+    timeout: float,
+    kind: str,
+    raise_not_found: bool = False,
+    retry: bool = True,
+) -> dict | None:
+    """POST a JSON payload to the add-on and return the parsed response.
+
+    Transient failures (429, 502-504 and failures to connect) are retried
+    with exponential backoff, honoring a Retry-After header when present.
+    Without retry, only failures to connect are retried. Other client errors
+    (e.g. a dropped connection or truncated response) are never retried, as
+    the add-on may already have delivered the message. With raise_not_found,
+    a 404 raises _EndpointNotFound so callers can fall back on older add-on
+    versions.
+    """
+    # Encode once up front; retries resend the same body
+    data = json_bytes(payload)
+    for attempt in range(1, _RETRY_ATTEMPTS + 1):
+        delay = min(_RETRY_BASE_DELAY * 2 ** (attempt - 1), _RETRY_MAX_DELAY)
+        try:
+            async with session.post(
+                url,
+                data=data,
+                headers=_JSON_HEADERS,
+                timeout=aiohttp.ClientTimeout(total=timeout)
+            ) as response:
+                if response.status == 200:
+                    return json_loads(await response.read())
+                if response.status == 404 and raise_not_found:
+                    raise _EndpointNotFound(url)
+                error = await response.text()
+                if (
+                    not retry
+                    or response.status not in _RETRY_STATUSES
+                    or attempt == _RETRY_ATTEMPTS
+                ):
+                    _LOGGER.error("Failed to send WhatsApp %s: %s", kind, error)
+                    return None
+                delay = _retry_after(response.headers.get("Retry-After"), delay)
+                _LOGGER.warning(
+                    "WhatsApp %s send returned %s, retrying in %.1fs (attempt %d/%d)",
+                    kind, response.status, delay, attempt, _RETRY_ATTEMPTS,
+                )
+        except _EndpointNotFound:
+            raise
+        except aiohttp.ClientError as err:
+            # Only a failed connect guarantees nothing reached the add-on
+            if attempt == _RETRY_ATTEMPTS or not isinstance(
+                err, aiohttp.ClientConnectorError
+            ):
+                _LOGGER.error("Error sending WhatsApp %s: %s", kind, err)
+                return None
+            _LOGGER.warning(
+                "Error sending WhatsApp %s: %s, retrying in %.1fs (attempt %d/%d)",
+                kind, err, delay, attempt, _RETRY_ATTEMPTS,
+            )
+        except Exception as err:
+            _LOGGER.error("Error sending WhatsApp %s: %s", kind, err)
+            return None
+        await asyncio.sleep(delay)
+    return None
+
+
+def _retry_after(value: str | None, default: float) -> float:
+    """Parse a Retry-After header in seconds, bounded to the retry window."""
+    if value is None:
+        return default
+    try:
+        seconds = float(value)
+    except ValueError:
+        return default
+    return min(max(seconds, _RETRY_BASE_DELAY), _RETRY_MAX_DELAY)
+
+
 async def async_setup(hass: HomeAssistant, config: dict) -> bool:
     """Set up the WhatsApp Gateway component."""
     hass.data.setdefault(DOMAIN, {})
@@ -50,75 +205,171 @@ async def async_setup(hass: HomeAssistant, config: dict) -> bool:
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up WhatsApp Gateway from a config entry."""
-    addon_url = entry.data.get(CONF_ADDON_URL, DEFAULT_ADDON_URL)
+    addon_url = entry.data.get(CONF_ADDON_URL, DEFAULT_ADDON_URL).rstrip("/")
+    send_url = f"{addon_url}/api/wa/send"
+    send_media_url = f"{addon_url}/api/wa/send-media"
+    send_batch_url = f"{addon_url}/api/wa/send-batch"
+    # All sends go to the single add-on host, so keep a dedicated pool of
+    # keep-alive connections. Idle sockets are dropped before the add-on's
+    # Node server closes them (5s keepAliveTimeout), so a send never lands on
+    # a socket the server is tearing down. aiohttp's default 10s DNS cache is
+    # kept because the add-on container can get a new IP when it restarts.
+    # The connector does not own a resolver passed in, so it is closed on unload
+    resolver = aiohttp.AsyncResolver()
+    session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(
+            limit=32,
+            limit_per_host=16,
+            keepalive_timeout=4,
+            resolver=resolver,
+        )
+    )
+
+    # Bound in-flight sends and space them out to respect WhatsApp rate caps
+    concurrency = entry.options.get(CONF_CONCURRENCY, DEFAULT_CONCURRENCY)
+    rate_limit = entry.options.get(CONF_RATE_LIMIT, DEFAULT_RATE_LIMIT)
+    semaphore = asyncio.Semaphore(concurrency)
+    min_interval = 1 / rate_limit
+    next_send_ts = [0.0]
     
     hass.data[DOMAIN][entry.entry_id] = {
         CONF_ADDON_URL: addon_url,
+        "send_url": send_url,
+        "send_media_url": send_media_url,
+        "send_batch_url": send_batch_url,
+        "session": session,
+        "resolver": resolver,
+        "semaphore": semaphore,
     }
 
+    # Set when the add-on reports that it has no batch endpoint, so an add-on
+    # upgrade is picked up without reloading the integration
+    batch_retry_at = [0.0]
+
+    async def _send(
+        url: str,
+        payload: dict,
+        timeout: float,
+        kind: str,
+        raise_not_found: bool = False,
+        retry: bool = True,
+        count: int = 1,
+    ) -> dict | None:
+        """Send a request to the add-on within the concurrency and rate limits.
+
+        A request carrying several messages reserves one send slot per message.
+        """
+        async with semaphore:
+            # Reserve the next free send slots before sleeping so concurrent
+            # callers never share the same slot
+            now = hass.loop.time()
+            send_at = max(now, next_send_ts[0])
+            next_send_ts[0] = send_at + count * min_interval
+            if send_at > now:
+                await asyncio.sleep(send_at - now)
+            return await _post_json(
+                session, url, payload, timeout, kind, raise_not_found, retry
+            )
+
     async def async_send_message(call: ServiceCall) -> None:
         """Handle send_message service calls."""
-        number = call.data[ATTR_NUMBER]
+        number = _normalize_jid(call.data[ATTR_NUMBER])
         text = call.data[ATTR_TEXT]
-        
-        # Normalize phone number
-        if "@" not in number:
-            # Remove any non-numeric characters
-            clean_number = "".join(filter(str.isdigit, number))
-            number = f"{clean_number}@s.whatsapp.net"
-        
         _LOGGER.debug("Sending WhatsApp message to %s: %s", number, text[:50])
-        
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{addon_url}/api/wa/send",
-                    json={"to": number, "text": text},
-                    timeout=aiohttp.ClientTimeout(total=30)
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        _LOGGER.info("WhatsApp message sent successfully: %s", result.get("message_id"))
-                    else:
-                        error = await response.text()
-                        _LOGGER.error("Failed to send WhatsApp message: %s", error)
-        except Exception as err:
-            _LOGGER.error("Error sending WhatsApp message: %s", err)
+        result = await _send(
+            send_url,
+            {"to": number, "text": text},
+            30,
+            "message",
+        )
+        if result is not None:
+            _LOGGER.info("WhatsApp message sent successfully: %s", result.get("message_id"))
 
     async def async_send_media(call: ServiceCall) -> None:
         """Handle send_media service calls."""
-        number = call.data[ATTR_NUMBER]
+        number = _normalize_jid(call.data[ATTR_NUMBER])
         media_url = call.data[ATTR_MEDIA_URL]
-        media_type = call.data.get(ATTR_MEDIA_TYPE, "image")
-        caption = call.data.get(ATTR_CAPTION, "")
-        
-        # Normalize phone number
-        if "@" not in number:
-            clean_number = "".join(filter(str.isdigit, number))
-            number = f"{clean_number}@s.whatsapp.net"
-        
         _LOGGER.debug("Sending WhatsApp media to %s: %s", number, media_url)
-        
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{addon_url}/api/wa/send-media",
-                    json={
-                        "to": number,
-                        "media_url": media_url,
-                        "media_type": media_type,
-                        "caption": caption,
+        result = await _send(
+            send_media_url,
+            {
+                "to": number,
+                "media_url": media_url,
+                "media_type": call.data.get(ATTR_MEDIA_TYPE, "image"),
+                "caption": call.data.get(ATTR_CAPTION, ""),
+            },
+            60,
+            "media",
+        )
+        if result is not None:
+            _LOGGER.info("WhatsApp media sent successfully: %s", result.get("message_id"))
+
+    async def async_send_messages(call: ServiceCall) -> None:
+        """Handle send_messages service calls."""
+        text = call.data[ATTR_TEXT]
+        messages = [
+            {"to": _normalize_jid(number), "text": text}
+            for number in call.data[ATTR_RECIPIENTS]
+        ]
+        _LOGGER.debug("Sending WhatsApp message to %d recipients: %s", len(messages), text[:50])
+
+        if hass.loop.time() >= batch_retry_at[0]:
+            try:
+                # Not retried on errors that may follow a partial send, as
+                # that would resend the batch to recipients already reached.
+                # The add-on spaces the messages by the configured rate limit
+                result = await _send(
+                    send_batch_url,
+                    {
+                        "messages": messages,
+                        "interval_ms": round(min_interval * 1000),
                     },
-                    timeout=aiohttp.ClientTimeout(total=60)
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        _LOGGER.info("WhatsApp media sent successfully: %s", result.get("message_id"))
-                    else:
-                        error = await response.text()
-                        _LOGGER.error("Failed to send WhatsApp media: %s", error)
-        except Exception as err:
-            _LOGGER.error("Error sending WhatsApp media: %s", err)
+                    _BATCH_TIMEOUT
+                    + (_BATCH_TIMEOUT_PER_MESSAGE + min_interval) * len(messages),
+                    "batch",
+                    raise_not_found=True,
+                    retry=False,
+                    count=len(messages),
+                )
+            except _EndpointNotFound:
+                _LOGGER.info(
+                    "Add-on has no batch endpoint, sending messages individually "
+                    "for the next %d minutes",
+                    _BATCH_REPROBE_INTERVAL // 60,
+                )
+                batch_retry_at[0] = hass.loop.time() + _BATCH_REPROBE_INTERVAL
+            else:
+                if result is None:
+                    return
+                items = result.get("results", [])
+                for item in items:
+                    if not item.get("success"):
+                        _LOGGER.error(
+                            "Failed to send WhatsApp message to %s: %s",
+                            item.get("to"), item.get("error"),
+                        )
+                _LOGGER.info(
+                    "WhatsApp batch sent: %d of %d messages succeeded",
+                    sum(1 for item in items if item.get("success")), len(messages),
+                )
+                return
+
+        # Older add-on versions: one request per recipient. The requests
+        # overlap, bounded by the semaphore and rate gate in _send
+        results = await asyncio.gather(
+            *[_send(send_url, message, 30, "message") for message in messages],
+            return_exceptions=True,
+        )
+        failed = [
+            message["to"]
+            for message, result in zip(messages, results)
+            if result is None or isinstance(result, BaseException)
+        ]
+        if failed:
+            _LOGGER.error(
+                "Failed to send WhatsApp message to %d of %d recipients: %s",
+                len(failed), len(messages), ", ".join(failed),
+            )
 
     # Register services
     hass.services.async_register(
@@ -135,15 +386,32 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         schema=SEND_MEDIA_SCHEMA,
     )
 
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SEND_MESSAGES,
+        async_send_messages,
+        schema=SEND_MESSAGES_SCHEMA,
+    )
+
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
+
     _LOGGER.info("WhatsApp Gateway services registered successfully")
     return True
 
 
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the config entry when its options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     # Remove services
     hass.services.async_remove(DOMAIN, SERVICE_SEND_MESSAGE)
     hass.services.async_remove(DOMAIN, SERVICE_SEND_MEDIA)
+    hass.services.async_remove(DOMAIN, SERVICE_SEND_MESSAGES)
     
-    hass.data[DOMAIN].pop(entry.entry_id)
+    data = hass.data[DOMAIN].pop(entry.entry_id)
+    await data["session"].close()
+    await data["resolver"].close()
     return True
@@ -7,11 +7,20 @@ from typing import Any
 import aiohttp
 import voluptuous as vol
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import HomeAssistantError
-
-from . import CONF_ADDON_URL, DEFAULT_ADDON_URL, DOMAIN
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from . import (
+    CONF_ADDON_URL,
+    CONF_CONCURRENCY,
+    CONF_RATE_LIMIT,
+    DEFAULT_ADDON_URL,
+    DEFAULT_CONCURRENCY,
+    DEFAULT_RATE_LIMIT,
+    DOMAIN,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -23,17 +32,16 @@ STEP_USER_DATA_SCHEMA = vol.Schema({
 async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str, Any]:
     """Validate the user input allows us to connect."""
     addon_url = data[CONF_ADDON_URL].rstrip("/")
-    
+    session = async_get_clientsession(hass)
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                f"{addon_url}/api/ha/status",
-                timeout=aiohttp.ClientTimeout(total=10)
-            ) as response:
-                if response.status != 200:
-                    raise CannotConnect
-                result = await response.json()
-                _LOGGER.debug("Connection test result: %s", result)
+        async with session.get(
+            f"{addon_url}/api/ha/status",
+            timeout=aiohttp.ClientTimeout(total=10)
+        ) as response:
+            if response.status != 200:
+                raise CannotConnect
+            result = await response.json()
+            _LOGGER.debug("Connection test result: %s", result)
     except aiohttp.ClientError as err:
         _LOGGER.error("Connection error: %s", err)
         raise CannotConnect from err
@@ -49,6 +57,14 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> OptionsFlowHandler:
+        """Get the options flow for this handler."""
+        return OptionsFlowHandler(config_entry)
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
@@ -82,5 +98,35 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         )
 
 
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle WhatsApp Gateway options."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize options flow."""
+        self._config_entry = config_entry
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the send limits."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self._config_entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema({
+                vol.Required(
+                    CONF_CONCURRENCY,
+                    default=options.get(CONF_CONCURRENCY, DEFAULT_CONCURRENCY),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
+                vol.Required(
+                    CONF_RATE_LIMIT,
+                    default=options.get(CONF_RATE_LIMIT, DEFAULT_RATE_LIMIT),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0.1, max=500)),
+            }),
+        )
+
+
 class CannotConnect(HomeAssistantError):
     """Error to indicate we cannot connect."""
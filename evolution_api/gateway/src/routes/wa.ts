@@ -485,7 +485,52 @@ export function createWaRoutes(evolutionClient: EvolutionClient, db: DatabasePoo
       res.status(500).json({ error: error.message });
     }
   });
-  
+
+  /**
+   * POST /api/wa/send-batch
+   * Send text messages to multiple recipients in one request
+   */
+  router.post('/send-batch', async (req: Request, res: Response) => {
+    const { messages, instance_name, interval_ms } = req.body;
+    const instanceName = instance_name || config.instanceName;
+    // Minimum delay between consecutive sends, so batches honor the caller's rate limit
+    const intervalMs = Math.max(0, Number(interval_ms) || 0);
+
+    if (!Array.isArray(messages) || messages.length === 0) {
+      return res.status(400).json({ error: 'messages must be a non-empty array' });
+    }
+
+    const results: { to: string; success: boolean; message_id?: string; error?: string }[] = [];
+    for (const [index, message] of messages.entries()) {
+      if (index > 0 && intervalMs > 0) {
+        await new Promise((resolve) => setTimeout(resolve, intervalMs));
+      }
+
+      const to = message?.to;
+      try {
+        const { text } = message;
+        if (typeof to !== 'string' || typeof text !== 'string') {
+          throw new Error('each message requires string "to" and "text" fields');
+        }
+
+        // Normalize the recipient
+        let chatId = to;
+        if (!to.includes('@')) {
+          const cleanNumber = to.replace(/[^0-9]/g, '');
+          chatId = `${cleanNumber}@s.whatsapp.net`;
+        }
+
+        const result = await evolutionClient.sendTextMessage(instanceName, chatId, text);
+        results.push({ to, success: true, message_id: result.key?.id });
+      } catch (error: any) {
+        console.error(`[WA] Send batch message to ${to} error:`, error);
+        results.push({ to, success: false, error: error.message });
+      }
+    }
+
+    res.json({ success: results.every((r) => r.success), results });
+  });
+
   /**
    * GET /api/wa/status
    * Get overall connection status